@@ -1,13 +1,15 @@
-from fastapi import FastAPI, Query, Header
+from fastapi import FastAPI, Query, Header, Request, Response
 from typing import Optional
 from .models import Profile, Context, MatchOutput
-from .prompt import render_prompt, SYSTEM_TEXT
+from .prompt import render_demo, render_prompt_serialized, SYSTEM_TEXT
 from .llm import MockLLM, extract_json
 from .safety import validate_output
 from .retrieval import EmbeddingIndex
-from .mmr import select_mmr
+from .pipeline import prepare_match
 from .ab import load_config, choose_version
-import json, os
+from .serde import dumps_bytes, loads
+from .scheduler import MicroBatchScheduler, degraded_output, PRIORITY_REALTIME, PRIORITY_DEFAULT
+import json, os, time
 
 app = FastAPI(title="Bridgit Matching API", version="2.0")
 DEMO_PATH = os.getenv("DEMO_PATH","data/demos.json")
@@ -17,25 +19,56 @@ AB_PATH = os.getenv("AB_PATH","ab_config.yaml")
 with open(DEMO_PATH,"r",encoding="utf-8") as f: DEMOS = json.load(f)
 with open(EVID_PATH,"r",encoding="utf-8") as f: EVIDENCE = json.load(f)
 AB_CFG = load_config(AB_PATH)
+# Demos are serialized once at startup: the index holds their retrieval text, DEMO_BLOCKS their prompt text.
+INDEX = EmbeddingIndex()
+INDEX.add_demos(DEMOS)
+DEMO_BLOCKS = [render_demo(d) for d in DEMOS]
+MATCH_KEYS = ("score", "factors", "risks", "suggestions")
+DEADLINE_MS = float(os.getenv("MATCH_DEADLINE_MS","2500"))
+SCHEDULER = MicroBatchScheduler(MockLLM(),
+                                window_ms=float(os.getenv("BATCH_WINDOW_MS","5")),
+                                max_batch=int(os.getenv("BATCH_MAX_SIZE","8")),
+                                max_queue=int(os.getenv("SCHED_MAX_QUEUE","256")),
+                                concurrency=int(os.getenv("SCHED_CONCURRENCY","32")))
+
+@app.middleware("http")
+async def stamp_arrival(request: Request, call_next):
+    # Deadlines count from arrival, so time spent before the handler runs is not invisible to admission control.
+    request.state.arrived = time.monotonic()
+    return await call_next(request)
 
 @app.get("/health")
 def health(): return {"status":"ok"}
 
+@app.get("/scheduler/stats")
+def scheduler_stats(): return SCHEDULER.stats()
+
+@app.get("/retrieval/stats")
+def retrieval_stats(): return INDEX.cache_stats()
+
+def _json_response(obj: dict) -> Response:
+    # obj has passed validate_output (types included); emit exactly the MatchOutput shape
+    # and skip FastAPI's response_model re-validation.
+    body = {k: obj[k] for k in MATCH_KEYS}
+    body["suggestions"] = [{"for": s["for"], "text": s["text"]} for s in obj["suggestions"]]
+    return Response(content=dumps_bytes(body), media_type="application/json")
+
 @app.post("/match", response_model=MatchOutput)
-def match(profile_a: Profile, profile_b: Profile, context: Context,
-          version: Optional[str] = Query(None), x_prompt_version: Optional[str] = Header(None)):
+async def match(request: Request, profile_a: Profile, profile_b: Profile, context: Context,
+                version: Optional[str] = Query(None), x_prompt_version: Optional[str] = Header(None),
+                x_deadline_ms: Optional[float] = Header(None)):
     selected_version = choose_version(AB_CFG, user_key=(profile_a.currentCompany or "anon"),
                                       override=(version or x_prompt_version))
-    query_text = json.dumps({"A":profile_a.model_dump(),"B":profile_b.model_dump(),"C":context.model_dump()}, ensure_ascii=False)
-    index = EmbeddingIndex()
-    index.add_demos(DEMOS)
-    idxs = index.search(query_text, k=4)
-    retrieved = [DEMOS[i] for i in idxs]
-    demos = select_mmr(query_text, retrieved, k=2, lam=0.7)
+    blocks, a_json, b_json, c_json = prepare_match(INDEX, DEMOS, DEMO_BLOCKS, profile_a, profile_b, context)
     evidence = EVIDENCE[:2]
 
-    prompt = render_prompt(demos, evidence, profile_a.model_dump(), profile_b.model_dump(), context.model_dump(), version=selected_version)
-    raw = MockLLM().chat(prompt["system"], prompt["user"])
-    obj = json.loads(extract_json(raw))
+    prompt = render_prompt_serialized(blocks, evidence, a_json, b_json, c_json, version=selected_version)
+    priority = PRIORITY_REALTIME if (profile_a.realTimeAvailability or profile_b.realTimeAvailability) else PRIORITY_DEFAULT
+    # async so requests queue only in the scheduler (where they are ordered and shed), not in the threadpool
+    raw = await SCHEDULER.submit_async(prompt["system"], prompt["user"], deadline_ms=(x_deadline_ms or DEADLINE_MS),
+                                       priority=priority, arrived=request.state.arrived)
+    if raw is None:
+        return _json_response(degraded_output("deadline"))
+    obj = loads(extract_json(raw))
     validate_output(obj)
-    return obj
+    return _json_response(obj)
@@ -0,0 +1,18 @@
+from typing import Dict, List, Tuple
+from .models import Profile, Context
+from .prompt import build_query_text
+from .retrieval import EmbeddingIndex
+from .mmr import select_mmr_indices
+
+def prepare_match(index: EmbeddingIndex, demos: List[Dict], demo_blocks: List[str],
+                  profile_a: Profile, profile_b: Profile, context: Context) -> Tuple[List[str], str, str, str]:
+    """Serialize one /match request and pick its demos; shared by app.match and the replay harness.
+
+    Returns (selected demo blocks, profile A JSON, profile B JSON, context JSON), ready for render_prompt_serialized.
+    """
+    a_json, b_json, c_json = profile_a.model_dump_json(), profile_b.model_dump_json(), context.model_dump_json()
+    query_text = build_query_text(a_json, b_json, c_json)
+    idxs = index.search(query_text, k=4)
+    retrieved = [demos[i] for i in idxs]
+    demo_idxs = [idxs[j] for j in select_mmr_indices(query_text, retrieved, k=2, lam=0.7)]
+    return [demo_blocks[i] for i in demo_idxs], a_json, b_json, c_json
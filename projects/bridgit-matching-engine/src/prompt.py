@@ -1,6 +1,6 @@
 from typing import List, Dict
-import json
 from .safety import strip_protected_terms
+from .serde import dumps
 
 SYSTEM_TEXT = """You are Bridgit Social’s matching assistant. Return ONLY valid JSON per the schema.
 Authority: Instructions > Evidence > Demos. If conflict, follow this order.
@@ -24,32 +24,38 @@ SCHEMA (return exactly these keys)
 }
 """
 
-def render_prompt(demos: List[Dict], evidence_snippets: List[str], profile_a: Dict, profile_b: Dict, context: Dict, version: str="v1") -> Dict:
-    demos_block = []
-    for d in demos:
-        demos_block.append(
-            f'# Demo\nPROFILES:\nA: {json.dumps(d["A"], ensure_ascii=False)}\nB: {json.dumps(d["B"], ensure_ascii=False)}\nCONTEXT: {json.dumps(d["CONTEXT"], ensure_ascii=False)}\nOUTPUT:\n{json.dumps(d["OUTPUT"], ensure_ascii=False)}'
-        )
-    demos_text = "\n\n".join(demos_block) if demos_block else "# No demos selected"
+def render_demo(d: Dict) -> str:
+    block = f'# Demo\nPROFILES:\nA: {dumps(d["A"])}\nB: {dumps(d["B"])}\nCONTEXT: {dumps(d["CONTEXT"])}\nOUTPUT:\n{dumps(d["OUTPUT"])}'
+    return strip_protected_terms(block)
+
+def build_query_text(profile_a_json: str, profile_b_json: str, context_json: str) -> str:
+    return f'{{"A":{profile_a_json},"B":{profile_b_json},"C":{context_json}}}'
+
+def render_prompt_serialized(demo_blocks: List[str], evidence_snippets: List[str], profile_a_json: str, profile_b_json: str, context_json: str, version: str="v1") -> Dict:
+    # demo_blocks come from render_demo (already redacted); profiles/context are canonical JSON from serde.
+    demos_text = "\n\n".join(demo_blocks) if demo_blocks else "# No demos selected"
     evidence_text = "\n".join([f"[E{i+1}] {e}" for i, e in enumerate(evidence_snippets)]) if evidence_snippets else "(none)"
-    safe_demos_text = strip_protected_terms(demos_text)
 
     header = f"### PROMPT_VERSION: {version}"
     user_text = f"""{header}
 
 ### DEMOS
-{safe_demos_text}
+{demos_text}
 
 ### EVIDENCE
 {evidence_text}
 
 ### QUERY
 PROFILES:
-A: {json.dumps(profile_a, ensure_ascii=False)}
-B: {json.dumps(profile_b, ensure_ascii=False)}
-CONTEXT: {json.dumps(context, ensure_ascii=False)}
+A: {profile_a_json}
+B: {profile_b_json}
+CONTEXT: {context_json}
 
 Return ONLY the JSON per SCHEMA.
 STOP: ###
 """
     return {"system": SYSTEM_TEXT, "user": user_text}
+
+def render_prompt(demos: List[Dict], evidence_snippets: List[str], profile_a: Dict, profile_b: Dict, context: Dict, version: str="v1") -> Dict:
+    return render_prompt_serialized([render_demo(d) for d in demos], evidence_snippets,
+                                    dumps(profile_a), dumps(profile_b), dumps(context), version=version)
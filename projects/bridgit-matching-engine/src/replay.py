@@ -0,0 +1,163 @@
+import argparse, importlib, json, re, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from .ab import load_config
+from .models import Profile, Context
+from .prompt import render_demo, render_prompt_serialized
+from .pipeline import prepare_match
+from .retrieval import EmbeddingIndex
+from .llm import MockLLM, extract_json
+from .safety import validate_output, contains_protected
+try:
+    import tiktoken
+    _ENC = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENC = None
+
+TOKEN_REGRESSION = 0.30
+
+def count_tokens(text: str) -> int:
+    if _ENC is not None:
+        return len(_ENC.encode(text))
+    # Rough fallback: words and punctuation marks.
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+def load_requests(path: str) -> List[Dict]:
+    # JSONL of logged /match bodies: {"profile_a": {...}, "profile_b": {...}, "context": {...}}
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def classify_output(raw: str) -> str:
+    """Return "ok", "schema" or "safety" for one model response."""
+    try:
+        obj = json.loads(extract_json(raw))
+    except ValueError:
+        return "schema"
+    suggestions = obj.get("suggestions") if isinstance(obj, dict) else None
+    if isinstance(suggestions, list) and any(isinstance(s, dict) and contains_protected(s.get("text","")) for s in suggestions):
+        return "safety"
+    try:
+        validate_output(obj)
+    except ValueError:
+        return "schema"
+    return "ok"
+
+def _pct(values: List[float], q: float) -> float:
+    if not values: return 0.0
+    vals = sorted(values)
+    return vals[min(len(vals) - 1, int(q * len(vals)))]
+
+def _prepare(requests: List[Dict], demo_bank: List[Dict]) -> List[Tuple[List[str], str, str, str]]:
+    # Same Profile/Context parsing, serialization and demo selection as app.match.
+    # None of it depends on the prompt version, so do it once per request.
+    if demo_bank:
+        index = EmbeddingIndex()
+        index.add_demos(demo_bank)
+        demo_blocks = [render_demo(d) for d in demo_bank]
+    out = []
+    for r in requests:
+        a, b, c = Profile(**r.get("profile_a",{})), Profile(**r.get("profile_b",{})), Context(**r.get("context",{}))
+        if demo_bank:
+            out.append(prepare_match(index, demo_bank, demo_blocks, a, b, c))
+        else:
+            out.append(([], a.model_dump_json(), b.model_dump_json(), c.model_dump_json()))
+    return out
+
+def replay(requests: List[Dict], versions: List[str], demo_bank: List[Dict] = None, evidence: List[str] = None,
+           llm=None, renderers: Optional[Dict[str, Callable]] = None, max_workers: int = 8,
+           baseline: str = None) -> Dict:
+    """Replay logged requests through each prompt version against a stub model and compare.
+
+    `renderers` maps a version to a render_prompt_serialized-compatible callable (defaults
+    to render_prompt_serialized, where versions differ only in the PROMPT_VERSION header);
+    `baseline` is the version token deltas are measured against.
+    """
+    llm = llm or MockLLM()
+    renderers = renderers or {}
+    evidence = (evidence or [])[:2]
+    prepared = _prepare(requests, demo_bank)
+
+    def run_one(version: str, i: int) -> Dict:
+        blocks, a_json, b_json, c_json = prepared[i]
+        render = renderers.get(version, render_prompt_serialized)
+        t0 = time.perf_counter()
+        prompt = render(blocks, evidence, a_json, b_json, c_json, version=version)
+        raw = llm.chat(prompt["system"], prompt["user"])
+        latency = time.perf_counter() - t0
+        return {"tokens": count_tokens(prompt["system"]) + count_tokens(prompt["user"]),
+                "latency_ms": 1000.0 * latency, "status": classify_output(raw)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {v: [pool.submit(run_one, v, i) for i in range(len(requests))] for v in versions}
+        results = {v: [f.result() for f in fs] for v, fs in futures.items()}
+
+    report = {}
+    for v, rows in results.items():
+        n = len(rows)
+        tokens = [row["tokens"] for row in rows]
+        lat = [row["latency_ms"] for row in rows]
+        report[v] = {
+            "requests": n,
+            "prompt_tokens_mean": round(sum(tokens) / n, 1) if n else 0.0,
+            "prompt_tokens_p95": _pct(tokens, 0.95),
+            "latency_ms_p50": round(_pct(lat, 0.50), 3),
+            "latency_ms_p95": round(_pct(lat, 0.95), 3),
+            "schema_pass_rate": round(sum(row["status"] == "ok" for row in rows) / n, 4) if n else 0.0,
+            "safety_rejections": sum(row["status"] == "safety" for row in rows),
+        }
+    baseline = baseline or versions[0]
+    base_tokens = report[baseline]["prompt_tokens_mean"] if baseline in report else 0.0
+    for v, row in report.items():
+        delta = (row["prompt_tokens_mean"] - base_tokens) / base_tokens if base_tokens else 0.0
+        row["token_delta_vs_baseline"] = round(delta, 4)
+        row["token_regression"] = delta > TOKEN_REGRESSION
+    return {"baseline": baseline, "versions": report}
+
+def format_report(report: Dict) -> str:
+    cols = ["prompt_tokens_mean","token_delta_vs_baseline","latency_ms_p50","latency_ms_p95","schema_pass_rate","safety_rejections"]
+    lines = [f"baseline: {report['baseline']}", "version\t" + "\t".join(cols)]
+    for v, row in report["versions"].items():
+        flag = "  <-- token regression" if row["token_regression"] else ""
+        lines.append(v + "\t" + "\t".join(str(row[c]) for c in cols) + flag)
+    return "\n".join(lines)
+
+def load_renderer(spec: str) -> Tuple[str, Callable]:
+    # "VERSION=package.module:func" -> (VERSION, func)
+    version, _, target = spec.partition("=")
+    module, _, func = target.partition(":")
+    if not (version and module and func):
+        raise ValueError(f"--renderer expects VERSION=module:func, got {spec!r}")
+    return version, getattr(importlib.import_module(module), func)
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay logged /match requests across prompt versions.")
+    ap.add_argument("requests", help="JSONL of logged request bodies")
+    ap.add_argument("--versions", nargs="*", help="prompt versions (default: ab config default + canary)")
+    ap.add_argument("--ab", default="ab_config.yaml")
+    ap.add_argument("--demos", default="data/demos.json")
+    ap.add_argument("--evidence", default="data/evidence_store.json")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--renderer", action="append", default=[], metavar="VERSION=module:func",
+                    help="render_prompt_serialized-compatible callable for a version; without one, versions "
+                         "differ only in the PROMPT_VERSION header and token counts will not diverge")
+    ap.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = ap.parse_args()
+
+    baseline = None
+    versions = args.versions
+    if not versions:
+        cfg = load_config(args.ab)
+        baseline = cfg.get("default_version","v1")
+        versions = [baseline, cfg.get("canary_version","v2")]
+    with open(args.demos,"r",encoding="utf-8") as f: demo_bank = json.load(f)
+    with open(args.evidence,"r",encoding="utf-8") as f: evidence = json.load(f)
+
+    renderers = dict(load_renderer(spec) for spec in args.renderer)
+    report = replay(load_requests(args.requests), versions, demo_bank=demo_bank, evidence=evidence,
+                    renderers=renderers, max_workers=args.workers, baseline=baseline)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if any(row["token_regression"] for row in report["versions"].values()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
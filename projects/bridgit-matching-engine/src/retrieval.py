@@ -1,6 +1,8 @@
-import os, json
+import os, threading
 from typing import List, Dict
 import numpy as np
+from .serde import dumps
+from .cache import LRUCache, normalize_query
 try:
     from sklearn.feature_extraction.text import TfidfVectorizer
     from sklearn.metrics.pairwise import cosine_similarity
@@ -9,27 +11,55 @@ except Exception:
     HAS_SK = False
 
 def _stringify_demo(d: Dict) -> str:
-    return json.dumps({"A": d.get("A"), "B": d.get("B"), "CONTEXT": d.get("CONTEXT")}, ensure_ascii=False)
+    return dumps({"A": d.get("A"), "B": d.get("B"), "CONTEXT": d.get("CONTEXT")})
 
 class EmbeddingIndex:
-    def __init__(self, backend: str = None):
+    def __init__(self, backend: str = None, cache_size: int = None):
         self.backend = backend or os.getenv("EMBED_BACKEND","tfidf")
-        self.docs = []
-        self._tfidf = None
-        self._vecs = None
+        # (generation, docs, vectorizer, doc vectors), swapped as one reference so a concurrent
+        # search never sees a half-built index. Cache keys carry the generation, so entries
+        # from a previous add_demos() are never served.
+        self._state = (0, [], None, None)
+        self._build_lock = threading.Lock()
+        size = cache_size if cache_size is not None else int(os.getenv("RETRIEVAL_CACHE_SIZE","1024"))
+        self._qvec_cache = LRUCache(size)
+        self._result_cache = LRUCache(size)
+
+    @property
+    def generation(self) -> int:
+        return self._state[0]
+
+    @property
+    def docs(self) -> List[str]:
+        return self._state[1]
 
     def add_demos(self, demos: List[Dict]):
-        self.docs = [_stringify_demo(d) for d in demos]
+        docs = [_stringify_demo(d) for d in demos]
+        tfidf = vecs = None
         if self.backend == "tfidf" and HAS_SK:
-            self._tfidf = TfidfVectorizer(min_df=1, max_features=2048)
-            self._vecs = self._tfidf.fit_transform(self.docs)
+            tfidf = TfidfVectorizer(min_df=1, max_features=2048)
+            vecs = tfidf.fit_transform(docs)
         # Note: FAISS/OpenSearch stubs can be added here later.
+        with self._build_lock:
+            self._state = (self._state[0] + 1, docs, tfidf, vecs)
 
     def search(self, query: str, k: int = 3) -> List[int]:
-        if self.backend == "tfidf" and HAS_SK and self._tfidf is not None:
-            qv = self._tfidf.transform([query])
-            sims = cosine_similarity(qv, self._vecs)[0]
-            order = np.argsort(-sims)[:k]
+        generation, docs, tfidf, vecs = self._state
+        if self.backend == "tfidf" and HAS_SK and tfidf is not None:
+            key = (generation, normalize_query(query))
+            hit = self._result_cache.get(key + (k,))
+            if hit is not None:
+                return list(hit)
+            qv = self._qvec_cache.get(key)
+            if qv is None:
+                qv = tfidf.transform([key[1]])
+                self._qvec_cache.put(key, qv)
+            sims = cosine_similarity(qv, vecs)[0]
+            order = tuple(np.argsort(-sims)[:k])
+            self._result_cache.put(key + (k,), order)
             return list(order)
         # Fallback naive: return first k
-        return list(range(min(k, len(self.docs))))
+        return list(range(min(k, len(docs))))
+
+    def cache_stats(self) -> Dict:
+        return {"generation": self.generation, "vectors": self._qvec_cache.stats(), "results": self._result_cache.stats()}
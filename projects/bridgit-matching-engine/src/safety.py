@@ -14,12 +14,22 @@ def strip_protected_terms(text: str) -> str:
     return safe
 
 def validate_output(obj: Dict) -> None:
+    # Full schema + safety check in one pass (types included), so callers need no second validation.
+    if not isinstance(obj, dict): raise ValueError("output must be a JSON object")
     for k in ["score","factors","risks","suggestions"]:
         if k not in obj: raise ValueError(f"Missing key: {k}")
-    if not (0.0 <= float(obj["score"]) <= 1.0):
+    score = obj["score"]
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        raise ValueError("score must be a number")
+    if not (0.0 <= float(score) <= 1.0):
         raise ValueError("score must be 0.0–1.0")
+    for k in ["factors","risks"]:
+        if not isinstance(obj[k], list) or not all(isinstance(x, str) for x in obj[k]):
+            raise ValueError(f"{k} must be a list of strings")
     if not isinstance(obj["suggestions"], list) or len(obj["suggestions"]) != 2:
         raise ValueError("suggestions must be length 2")
     for s in obj["suggestions"]:
-        if contains_protected(s.get("text","")):
+        if not isinstance(s, dict) or s.get("for") not in ("initiator","recipient") or not isinstance(s.get("text"), str):
+            raise ValueError("suggestion must have for=initiator|recipient and a text string")
+        if contains_protected(s["text"]):
             raise ValueError("Suggestion contains protected terms")
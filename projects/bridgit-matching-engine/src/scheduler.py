@@ -0,0 +1,237 @@
+import asyncio, heapq, itertools, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+PRIORITY_REALTIME = 0
+PRIORITY_DEFAULT = 1
+
+def degraded_output(reason: str = "deadline") -> Dict:
+    # Served without a model call when a request is shed; still passes validate_output.
+    return {
+        "score": 0.0,
+        "factors": [],
+        "risks": [f"degraded:{reason}"],
+        "suggestions": [
+            {"for":"initiator","text":"If you’re open to meeting new people, would you like to exchange a quick hello? No worries if not."},
+            {"for":"recipient","text":"You can ignore or decline—your comfort comes first."}
+        ]
+    }
+
+class _Job:
+    __slots__ = ("system", "user", "priority", "deadline", "enqueued", "event", "result", "error",
+                 "on_done", "finished", "abandoned")
+    def __init__(self, system: str, user: str, priority: int, deadline: float, enqueued: float,
+                 on_done: Optional[Callable[[], None]] = None):
+        self.system, self.user = system, user
+        self.priority, self.deadline, self.enqueued = priority, deadline, enqueued
+        self.event = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.on_done = on_done
+        self.finished = False   # result/error (or expiry) is final; guarded by the scheduler lock
+        self.abandoned = False  # the caller stopped waiting and served a degraded response
+
+    def wake(self):
+        self.event.set()
+        if self.on_done is not None: self.on_done()
+
+class MicroBatchScheduler:
+    """Deadline/priority queue in front of the LLM client.
+
+    Jobs are handed out in (priority, deadline) order to `concurrency` call slots.
+    A client with a real batch API (`llm.chat_batch`) gets one call per batch of up
+    to `max_batch` jobs, gathered for up to `window_ms`; otherwise each job is its
+    own `llm.chat` call, started as soon as a slot frees up. Admission control
+    rejects a job up front when the queue is full or the estimated wait exceeds its
+    deadline; `submit`/`submit_async` then return None and the caller serves
+    `degraded_output()`. They also return None if the deadline passes while waiting.
+    """
+    def __init__(self, llm, window_ms: float = 5.0, max_batch: int = 8, max_queue: int = 256,
+                 concurrency: int = 32, service_ms: float = 50.0, sample_size: int = 1024):
+        self.llm = llm
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.concurrency = concurrency
+        self._batch_fn = getattr(llm, "chat_batch", None)
+        self._service = service_ms / 1000.0  # EWMA of one model call (a whole batch when batched)
+        self._heap: List[Tuple[int, float, int, _Job]] = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="llm-call")
+        self._slots = threading.Semaphore(concurrency)
+        self._inflight = 0  # popped from the heap and not yet finished
+        self._waits = deque(maxlen=sample_size)
+        self._counts = {"submitted": 0, "completed": 0, "shed_admission": 0, "shed_expired": 0,
+                        "shed_timeout": 0, "batches": 0}
+
+    def _estimate_wait(self, priority: int, deadline: float) -> float:
+        # Jobs queued ahead plus in-flight ones drain `per_round` at a time, one service time per round.
+        ahead = self._inflight + sum(1 for p, d, _, _ in self._heap if (p, d) <= (priority, deadline))
+        if self._batch_fn is None:
+            return (ahead // self.concurrency + 1) * self._service
+        return self.window + (ahead // (self.concurrency * self.max_batch) + 1) * self._service
+
+    def _enqueue(self, system: str, user: str, deadline_ms: float, priority: int,
+                 arrived: Optional[float], on_done: Optional[Callable[[], None]] = None) -> Optional[_Job]:
+        # `arrived` (time.monotonic()) lets callers start the deadline clock when the request came in.
+        now = time.monotonic()
+        start = arrived if arrived is not None else now
+        deadline = start + deadline_ms / 1000.0
+        with self._cv:
+            self._counts["submitted"] += 1
+            if len(self._heap) >= self.max_queue or now + self._estimate_wait(priority, deadline) > deadline:
+                self._counts["shed_admission"] += 1
+                return None
+            job = _Job(system, user, priority, deadline, start, on_done)
+            heapq.heappush(self._heap, (priority, deadline, next(self._seq), job))
+            self._ensure_worker()
+            self._cv.notify()
+        return job
+
+    def _outcome(self, job: _Job, timed_out: bool) -> Optional[str]:
+        with self._cv:
+            if timed_out and not job.finished:
+                job.abandoned = True
+                self._counts["shed_timeout"] += 1
+                return None
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def submit(self, system: str, user: str, deadline_ms: float, priority: int = PRIORITY_DEFAULT,
+               arrived: Optional[float] = None) -> Optional[str]:
+        job = self._enqueue(system, user, deadline_ms, priority, arrived)
+        if job is None:
+            return None
+        done = job.event.wait(max(0.0, job.deadline - time.monotonic()))
+        return self._outcome(job, timed_out=not done)
+
+    async def submit_async(self, system: str, user: str, deadline_ms: float, priority: int = PRIORITY_DEFAULT,
+                           arrived: Optional[float] = None) -> Optional[str]:
+        # Waits on the event loop instead of holding a threadpool thread per request.
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        def resolve():
+            if not fut.done(): fut.set_result(None)
+        def on_done():
+            try:
+                loop.call_soon_threadsafe(resolve)
+            except RuntimeError:
+                pass  # loop already closed (shutdown); nobody is waiting any more
+        job = self._enqueue(system, user, deadline_ms, priority, arrived, on_done=on_done)
+        if job is None:
+            return None
+        try:
+            await asyncio.wait_for(fut, timeout=max(0.0, job.deadline - time.monotonic()))
+            timed_out = False
+        except asyncio.TimeoutError:
+            timed_out = True
+        return self._outcome(job, timed_out)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="llm-scheduler", daemon=True)
+            self._worker.start()
+
+    def _next_batch(self) -> List[_Job]:
+        # Called with a call slot held, so popped jobs start immediately and count as in-flight.
+        with self._cv:
+            while not self._heap:
+                self._cv.wait()
+            if self._batch_fn is not None:
+                close = time.monotonic() + self.window
+                while len(self._heap) < self.max_batch:
+                    remaining = close - time.monotonic()
+                    if remaining <= 0: break
+                    self._cv.wait(remaining)
+                n = min(self.max_batch, len(self._heap))
+            else:
+                n = 1  # no batch API: no window, one job per slot
+            jobs = [heapq.heappop(self._heap)[3] for _ in range(n)]
+            self._inflight += n
+            self._counts["batches"] += 1
+            return jobs
+
+    def _start(self, jobs: List[_Job]) -> List[_Job]:
+        # Drops jobs whose deadline already passed and records queue wait up to this point.
+        now = time.monotonic()
+        live, expired = [], []
+        with self._cv:
+            for j in jobs:
+                (live if j.deadline > now and not j.abandoned else expired).append(j)
+            for j in expired:
+                j.finished = True
+                if not j.abandoned: self._counts["shed_expired"] += 1
+            self._waits.extend(now - j.enqueued for j in live)
+            self._inflight -= len(expired)
+        for j in expired:
+            j.wake()
+        if not live:
+            self._slots.release()
+        return live
+
+    def _finish(self, jobs: List[_Job], elapsed: float):
+        with self._cv:
+            self._service = 0.8 * self._service + 0.2 * elapsed
+            self._inflight -= len(jobs)
+            for j in jobs:
+                j.finished = True
+            # A call that returns after its caller gave up was already counted as shed_timeout.
+            self._counts["completed"] += sum(1 for j in jobs if not j.abandoned)
+        self._slots.release()
+        for j in jobs:
+            j.wake()
+
+    def _call_one(self, job: _Job):
+        t0 = time.monotonic()
+        try:
+            job.result = self.llm.chat(job.system, job.user)
+        except Exception as e:
+            job.error = e
+        self._finish([job], time.monotonic() - t0)
+
+    def _call_batch(self, jobs: List[_Job]):
+        t0 = time.monotonic()
+        try:
+            outs = self._batch_fn([(j.system, j.user) for j in jobs])
+            for j, out in zip(jobs, outs):
+                j.result = out
+        except Exception as e:
+            for j in jobs:
+                j.error = e
+        self._finish(jobs, time.monotonic() - t0)
+
+    def _run(self):
+        while True:
+            self._slots.acquire()
+            live = self._start(self._next_batch())
+            if not live:
+                continue
+            if self._batch_fn is not None:
+                self._pool.submit(self._call_batch, live)
+            else:
+                self._pool.submit(self._call_one, live[0])
+
+    def stats(self) -> Dict:
+        with self._cv:
+            waits = sorted(self._waits)
+            counts = dict(self._counts)
+            depth = len(self._heap)
+            inflight = self._inflight
+            service = self._service
+        def pct(q: float) -> float:
+            return round(1000.0 * waits[min(len(waits) - 1, int(q * len(waits)))], 3) if waits else 0.0
+        return {
+            "queue_depth": depth,
+            "max_queue": self.max_queue,
+            "inflight": inflight,
+            "concurrency": self.concurrency,
+            **counts,
+            "avg_batch_size": round(counts["completed"] / counts["batches"], 3) if counts["batches"] else 0.0,
+            "wait_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+                        "max": round(1000.0 * waits[-1], 3) if waits else 0.0},
+            "service_ms_ewma": round(1000.0 * service, 3),
+        }
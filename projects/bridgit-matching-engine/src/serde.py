@@ -0,0 +1,23 @@
+import json
+from typing import Any
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+# Canonical compact JSON shared by the retrieval query, prompt assembly and response body.
+# The stdlib fallback uses the same separators so both backends produce identical text.
+
+def dumps_bytes(obj: Any) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",",":")).encode("utf-8")
+
+def dumps(obj: Any) -> str:
+    return dumps_bytes(obj).decode("utf-8")
+
+def loads(data) -> Any:
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
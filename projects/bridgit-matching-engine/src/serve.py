@@ -0,0 +1,155 @@
+"""Pre-fork serving mode: `python -m src.serve --workers 64`.
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker re-loads DEMOS,
+EVIDENCE and the TF-IDF index. Here the parent imports `src.app` once and forks
+workers that share those pages copy-on-write. Two things keep them shared:
+
+- gc.disable() before the load and gc.freeze() before forking, so the cyclic GC
+  never writes to (or traverses) the parent's objects from a child.
+- The bulk of the index lives in numpy/scipy buffers, which carry no per-element
+  refcounts; only the small demo dicts/strings a request touches get copied.
+
+Linux only (fork + /proc/<pid>/smaps_rollup for the memory report).
+"""
+
+import argparse, gc, os, signal, socket, sys, time, traceback
+from typing import Dict, List
+
+MIN_UPTIME = 5.0     # a worker exiting sooner than this counts as a fast (crash) exit
+MAX_BACKOFF = 30.0
+
+MEM_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+def process_memory(pid="self") -> Dict[str, int]:
+    """kB figures from /proc/<pid>/smaps_rollup; Private_* is what the process does not share."""
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in MEM_FIELDS:
+                out[key] = int(rest.split()[0])
+    return out
+
+def memory_report(pids: Dict[str, int]) -> List[Dict]:
+    rows = []
+    for name, pid in pids.items():
+        try:
+            mem = process_memory(pid)
+        except OSError:
+            continue
+        mem["Private"] = mem.get("Private_Clean", 0) + mem.get("Private_Dirty", 0)
+        rows.append({"name": name, "pid": pid, **mem})
+    return rows
+
+def format_memory_report(rows: List[Dict]) -> str:
+    cols = ["Rss", "Pss", "Private", "Shared_Clean", "Shared_Dirty"]
+    lines = ["proc\tpid\t" + "\t".join(f"{c}_MiB" for c in cols)]
+    for r in rows:
+        lines.append(f'{r["name"]}\t{r["pid"]}\t' + "\t".join(f"{r.get(c, 0) / 1024:.1f}" for c in cols))
+    workers = [r for r in rows if r["name"] != "parent"]
+    if workers:
+        pss = sum(r["Pss"] for r in workers) / len(workers) / 1024
+        private = sum(r["Private"] for r in workers) / len(workers) / 1024
+        lines.append(f"per-worker mean: Pss {pss:.1f} MiB, Private {private:.1f} MiB ({len(workers)} workers)")
+    return "\n".join(lines)
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def _run_worker(sock: socket.socket, app, log_level: str):
+    import uvicorn
+    gc.enable()  # new objects only; the frozen parent heap is left alone
+    config = uvicorn.Config(app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve the matching API from pre-forked workers sharing one index.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--backlog", type=int, default=2048)
+    ap.add_argument("--log-level", default="warning")
+    ap.add_argument("--max-restarts", type=int, default=5, help="give up on a worker slot after this many consecutive fast exits")
+    ap.add_argument("--restart-backoff", type=float, default=0.5, help="initial restart delay in seconds, doubled per fast exit")
+    ap.add_argument("--report-interval", type=float, default=0.0, help="print a per-worker memory report every N seconds (0=off)")
+    args = ap.parse_args()
+
+    gc.disable()
+    from .app import app  # loads DEMOS, EVIDENCE, INDEX and DEMO_BLOCKS once, in the parent
+    gc.freeze()
+    sock = _bind(args.host, args.port, args.backlog)
+
+    children: Dict[int, int] = {}       # pid -> slot
+    started: Dict[int, float] = {}      # slot -> fork time
+    fast_exits: Dict[int, int] = {}     # slot -> consecutive fast exits
+    pending: Dict[int, float] = {}      # slot -> earliest restart time
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            # Never let the child unwind back into the supervisor loop.
+            code = 1
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                _run_worker(sock, app, args.log_level)
+                code = 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+        children[pid] = slot
+        started[slot] = time.monotonic()
+
+    stopping = False
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        pending.clear()
+        for pid in list(children):
+            try: os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError: pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(args.workers):
+        spawn(slot)
+    print(f"serving on http://{args.host}:{args.port} with {args.workers} pre-forked workers", file=sys.stderr)
+
+    gave_up = False
+    next_report = time.monotonic() + args.report_interval if args.report_interval else None
+    while children or pending:
+        pid, status = os.waitpid(-1, os.WNOHANG) if children else (0, 0)
+        now = time.monotonic()
+        if pid:
+            slot = children.pop(pid, None)
+            if not stopping and slot is not None:
+                fast_exits[slot] = fast_exits.get(slot, 0) + 1 if now - started[slot] < MIN_UPTIME else 0
+                if fast_exits[slot] > args.max_restarts:
+                    print(f"worker{slot} exited {fast_exits[slot]} times within {MIN_UPTIME:.0f}s of start "
+                          f"(status {status}); not restarting", file=sys.stderr)
+                    gave_up = True
+                else:
+                    # Re-fork from the parent so a replacement shares the same pages; back off on crash loops.
+                    delay = min(MAX_BACKOFF, args.restart_backoff * 2 ** (fast_exits[slot] - 1)) if fast_exits[slot] else 0.0
+                    pending[slot] = now + delay
+        for slot, at in list(pending.items()):
+            if now >= at:
+                del pending[slot]
+                spawn(slot)
+        if next_report is not None and now >= next_report:
+            pids = {"parent": os.getpid(), **{f"worker{slot}": pid for pid, slot in sorted(children.items(), key=lambda kv: kv[1])}}
+            print(format_memory_report(memory_report(pids)), file=sys.stderr)
+            next_report = now + args.report_interval
+        time.sleep(0.2)
+    if gave_up and not stopping:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import json, os, socket, threading, time, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+class _SlowLLM:
+    def chat(self, system, user):
+        time.sleep(0.2)
+        return json.dumps({"score":0.5,"factors":[],"risks":[],
+                           "suggestions":[{"for":"initiator","text":"hi"},{"for":"recipient","text":"ok"}]})
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_match_endpoint_sheds_under_load(tmp_path, monkeypatch):
+    uvicorn = pytest.importorskip("uvicorn")
+    ab = tmp_path / "ab.yaml"
+    ab.write_text("default_version: v1\ncanary_version: v2\ncanary_ratio: 0.05\n")
+    monkeypatch.setenv("AB_PATH", str(ab))
+    from src import app as app_module
+    from src.scheduler import MicroBatchScheduler
+    sched = MicroBatchScheduler(_SlowLLM(), concurrency=4)
+    monkeypatch.setattr(app_module, "SCHEDULER", sched)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started: time.sleep(0.05)
+
+    body = json.dumps({"profile_a": {"interests": ["data"]}, "profile_b": {"interests": ["ml"]},
+                       "context": {"city": "NY"}}).encode()
+    def call(_):
+        req = urllib.request.Request(f"http://127.0.0.1:{port}/match", data=body,
+                                     headers={"content-type": "application/json", "x-deadline-ms": "500"})
+        t0 = time.monotonic()
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, json.loads(resp.read()), time.monotonic() - t0
+    try:
+        with ThreadPoolExecutor(max_workers=100) as pool:
+            results = list(pool.map(call, range(100)))
+    finally:
+        server.should_exit = True
+
+    assert all(status == 200 for status, _, _ in results)
+    degraded = sum("degraded:deadline" in out["risks"] for _, out, _ in results)
+    stats = sched.stats()
+    # 4 slots x 200ms can serve only ~10 of 100 requests within 500ms; the rest must be shed fast
+    assert degraded > 50 and stats["shed_admission"] + stats["shed_timeout"] + stats["shed_expired"] == degraded
+    assert max(lat for _, _, lat in results) < 1.5
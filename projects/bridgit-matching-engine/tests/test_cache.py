@@ -0,0 +1,68 @@
+from src.cache import LRUCache, normalize_query
+
+def test_lru_eviction_and_stats():
+    c = LRUCache(maxsize=2)
+    c.put("a", 1); c.put("b", 2)
+    assert c.get("a") == 1          # "a" is now most recent
+    c.put("c", 3)                   # evicts "b"
+    assert c.get("b") is None
+    s = c.stats()
+    assert (s["size"], s["hits"], s["misses"], s["evictions"]) == (2, 1, 1, 1)
+    assert s["hit_rate"] == 0.5
+
+def test_normalize_query():
+    assert normalize_query("  Venue:Cafe\n GOALS:x ") == "venue:cafe goals:x"
+
+def _demo(interest, place):
+    return {"A": {"interests": [interest]}, "B": {"interests": [interest]}, "CONTEXT": {"place": place}, "OUTPUT": {}}
+
+def _index(cache_size=8):
+    import pytest
+    pytest.importorskip("sklearn")
+    from src.retrieval import EmbeddingIndex
+    idx = EmbeddingIndex(backend="tfidf", cache_size=cache_size)
+    idx.add_demos([_demo("espresso", "Coffee Shop"), _demo("networking", "Tech Mixer")])
+    return idx
+
+def test_index_hits_across_case_and_whitespace():
+    idx = _index()
+    first = idx.search("Coffee  shop espresso", k=1)
+    again = idx.search("  coffee SHOP\nESPRESSO ", k=1)
+    assert first == again == [0]
+    stats = idx.cache_stats()
+    assert stats["results"]["hits"] == 1 and stats["vectors"]["misses"] == 1
+
+def test_index_rebuild_invalidates_cache():
+    idx = _index()
+    assert idx.search("networking mixer", k=1) == [1]
+    idx.add_demos([_demo("networking", "Tech Mixer"), _demo("espresso", "Coffee Shop")])
+    assert idx.cache_stats()["generation"] == 2
+    assert idx.search("networking mixer", k=1) == [0]
+    assert idx.cache_stats()["results"]["hits"] == 0
+
+def test_index_cache_disabled():
+    idx = _index(cache_size=0)
+    assert idx.search("espresso", k=1) == idx.search("espresso", k=1) == [0]
+    stats = idx.cache_stats()
+    assert stats["results"]["size"] == stats["vectors"]["size"] == 0
+    assert stats["results"]["hits"] == 0
+
+def test_index_rebuild_while_searching():
+    import threading
+    idx = _index()
+    errors, stop = [], threading.Event()
+    def searcher():
+        while not stop.is_set():
+            try:
+                idx.search("espresso networking mixer", k=2)
+            except Exception as e:
+                errors.append(e)
+    ts = [threading.Thread(target=searcher) for _ in range(4)]
+    for t in ts: t.start()
+    # each rebuild has a different vocabulary size, so a torn read would mismatch dimensions
+    for i in range(50):
+        idx.add_demos([_demo(f"topic{j}", f"place{j}") for j in range(i % 5 + 2)])
+    stop.set()
+    for t in ts: t.join()
+    assert not errors
+    assert idx.generation == 51
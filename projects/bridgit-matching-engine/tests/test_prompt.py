@@ -0,0 +1,16 @@
+import json
+from src.prompt import render_demo, render_prompt, render_prompt_serialized, build_query_text
+from src.serde import dumps
+
+DEMO = {"A":{"interests":["ml"]},"B":{"interests":["startups"]},"CONTEXT":{"place":"Cafe"},
+        "OUTPUT":{"score":0.5,"factors":[],"risks":["age gap"],"suggestions":[]}}
+
+def test_serialized_path_matches_render_prompt():
+    a, b, c = {"interests":["data"]}, {"occupation":"Founder"}, {"city":"New York"}
+    expected = render_prompt([DEMO], ["E"], a, b, c, version="v2")
+    got = render_prompt_serialized([render_demo(DEMO)], ["E"], dumps(a), dumps(b), dumps(c), version="v2")
+    assert got == expected
+    assert "[REDACTED]" in got["user"]
+
+def test_query_text_is_valid_json():
+    assert json.loads(build_query_text(dumps({"x":"é"}), dumps({}), dumps({"y":None}))) == {"A":{"x":"é"},"B":{},"C":{"y":None}}
@@ -0,0 +1,38 @@
+import json
+from src.prompt import render_prompt_serialized
+from src.replay import replay, classify_output, load_renderer
+
+REQS = [{"profile_a":{"interests":["data"]},"profile_b":{"interests":["ml"]},"context":{"city":"NY"}}] * 3
+
+def _verbose(demo_blocks, evidence, a_json, b_json, c_json, version="v1"):
+    p = render_prompt_serialized(demo_blocks, evidence, a_json, b_json, c_json, version=version)
+    return {"system": p["system"] * 2, "user": p["user"]}
+
+def test_replay_flags_token_regression():
+    report = replay(REQS, ["v1", "v2"], renderers={"v2": _verbose}, max_workers=4)
+    v1, v2 = report["versions"]["v1"], report["versions"]["v2"]
+    assert v1["requests"] == 3 and v1["schema_pass_rate"] == 1.0
+    assert not v1["token_regression"] and v2["token_regression"]
+
+def test_classify_output():
+    ok = {"score":0.5,"factors":[],"risks":[],"suggestions":[{"for":"initiator","text":"hi"},{"for":"recipient","text":"ok"}]}
+    assert classify_output(json.dumps(ok)) == "ok"
+    assert classify_output("no json here") == "schema"
+    ok["suggestions"][0]["text"] = "ask about religion"
+    assert classify_output(json.dumps(ok)) == "safety"
+
+def test_replay_prompt_matches_app_serialization():
+    from src.models import Profile, Context
+    seen = []
+    class _Capture:
+        def chat(self, system, user):
+            seen.append(user)
+            return json.dumps({"score":0.5,"factors":[],"risks":[],"suggestions":[{"for":"initiator","text":"hi"},{"for":"recipient","text":"ok"}]})
+    replay(REQS[:1], ["v1"], llm=_Capture())
+    # null fields are included exactly as app.match's model_dump_json() would emit them
+    assert Profile(**REQS[0]["profile_a"]).model_dump_json() in seen[0]
+    assert Context(**REQS[0]["context"]).model_dump_json() in seen[0]
+
+def test_load_renderer():
+    version, fn = load_renderer("v3=src.prompt:render_prompt_serialized")
+    assert version == "v3" and fn is render_prompt_serialized
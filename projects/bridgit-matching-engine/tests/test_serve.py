@@ -0,0 +1,80 @@
+import json, os, pathlib, signal, socket, subprocess, sys, time, urllib.request
+import pytest
+from src.serve import memory_report, format_memory_report
+
+BASE = pathlib.Path(__file__).resolve().parents[1]
+
+def test_memory_report_for_current_process():
+    rows = memory_report({"parent": os.getpid(), "worker0": os.getpid()})
+    assert rows[0]["Rss"] > 0 and rows[0]["Private"] <= rows[0]["Rss"]
+    assert "per-worker mean" in format_memory_report(rows)
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _children(ppid: int):
+    out = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit(): continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # the comm field may contain spaces; ppid is the 2nd field after the closing paren
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == ppid:
+            out.append(int(entry))
+    return out
+
+def _serve(tmp_path, *args):
+    ab = tmp_path / "ab.yaml"
+    ab.write_text("default_version: v1\ncanary_version: v2\ncanary_ratio: 0.05\n")
+    env = {**os.environ, "AB_PATH": str(ab)}
+    return subprocess.Popen([sys.executable, "-m", "src.serve", *args], cwd=BASE, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+def test_forked_workers_serve_and_share_pages(tmp_path):
+    pytest.importorskip("uvicorn")
+    port = _free_port()
+    proc = _serve(tmp_path, "--workers", "2", "--port", str(port))
+    try:
+        body = json.dumps({"profile_a": {"interests": ["data"]}, "profile_b": {"interests": ["ml"]},
+                           "context": {"city": "NY"}}).encode()
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                req = urllib.request.Request(f"http://127.0.0.1:{port}/match", data=body,
+                                             headers={"content-type": "application/json"})
+                with urllib.request.urlopen(req, timeout=5) as resp:
+                    assert resp.status == 200 and "suggestions" in json.loads(resp.read())
+                break
+            except OSError:
+                assert proc.poll() is None and time.monotonic() < deadline
+                time.sleep(0.2)
+        for _ in range(20):
+            with urllib.request.urlopen(urllib.request.Request(f"http://127.0.0.1:{port}/match", data=body,
+                                        headers={"content-type": "application/json"}), timeout=5) as resp:
+                assert resp.status == 200
+
+        workers = _children(proc.pid)
+        assert len(workers) == 2
+        rows = memory_report({"parent": proc.pid, **{f"worker{i}": pid for i, pid in enumerate(workers)}})
+        parent = rows[0]
+        for w in rows[1:]:
+            shared = w["Shared_Clean"] + w["Shared_Dirty"]
+            assert shared > w["Private"]                # most of each worker is the parent's pages
+            assert w["Private"] < parent["Rss"] / 2     # nowhere near a full private copy
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=15)
+
+def test_crash_looping_worker_gives_up(tmp_path):
+    pytest.importorskip("uvicorn")
+    # an unknown log level makes uvicorn.Config fail in every child right after fork
+    proc = _serve(tmp_path, "--workers", "1", "--port", str(_free_port()), "--log-level", "nope",
+                  "--max-restarts", "2", "--restart-backoff", "0.1")
+    _, err = proc.communicate(timeout=30)
+    assert proc.returncode == 1
+    assert b"not restarting" in err
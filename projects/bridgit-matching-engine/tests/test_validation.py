@@ -1,3 +1,14 @@
 from src.safety import validate_output
 def test_validate_pass():
     validate_output({"score":0.5,"factors":["a"],"risks":["b"],"suggestions":[{"for":"initiator","text":"hi"},{"for":"recipient","text":"ok"}]})
+
+def test_validate_rejects_wrong_types():
+    import pytest
+    bad = [
+        {"score":0.5,"factors":"oops","risks":7,"suggestions":[{"text":"hi"},{"text":"yo"}]},
+        {"score":True,"factors":[],"risks":[],"suggestions":[{"for":"initiator","text":"hi"},{"for":"recipient","text":"ok"}]},
+        {"score":0.5,"factors":[],"risks":[],"suggestions":[{"for":"initiator","text":"hi"},{"for":"someone","text":"ok"}]},
+    ]
+    for obj in bad:
+        with pytest.raises(ValueError):
+            validate_output(obj)
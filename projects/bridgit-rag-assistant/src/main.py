@@ -11,7 +11,7 @@ End-to-end pipeline (CLI):
 8) Print JSON result
 """
 
-import os, json, yaml
+import os, json, yaml, threading
 from typing import Dict, Any
 from .retriever import build_knowledge_index, load_config
 from .mmr import mmr_select
@@ -26,6 +26,17 @@ DEMOS_PATH = os.path.join(DATA_DIR, "demos.json")
 CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
 SAMPLE_INPUT = os.path.join(BASE_DIR, "sample_input.json")
 
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+def get_knowledge_index():
+    # Build once per process so the retriever's query/result cache survives across calls.
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = build_knowledge_index(KNOW_DIR, CONFIG_PATH)
+        return _INDEX
+
 def build_query_text(obj: Dict[str, Any]) -> str:
     ip = obj.get("initiator_profile", {})
     rp = obj.get("recipient_profile", {})
@@ -56,7 +67,7 @@ def run_once(input_obj: Dict[str, Any]) -> Dict[str, Any]:
     }
 
     # Build index and retrieve
-    idx = build_knowledge_index(KNOW_DIR, CONFIG_PATH)
+    idx = get_knowledge_index()
     query_text = build_query_text(safe_obj)
     evidence = idx.search(query_text, top_k=cfg["top_k_docs"])
 
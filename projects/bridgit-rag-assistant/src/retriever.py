@@ -3,16 +3,19 @@
 Tiny TF-IDF-ish retriever over markdown docs in data/knowledge.
 - Splits documents into overlapping chunks.
 - Builds a simple DF map and computes cosine similarity on TF-IDF vectors.
+- Memoizes query vectors and top-k results in an LRU keyed by index generation.
 """
 
-import os, math, re, json, yaml
+import os, math, re, json, yaml, threading
 from collections import Counter, defaultdict
 from typing import List, Dict, Any, Tuple
+from .cache import LRUCache, normalize_query
 
 DEFAULT_CONFIG = {
     "chunk_size": 800,
     "chunk_overlap": 120,
-    "top_k_docs": 4
+    "top_k_docs": 4,
+    "query_cache_size": 1024
 }
 
 def load_config(path: str = None) -> Dict[str, Any]:
@@ -41,11 +44,32 @@ def tf(counter: Counter) -> Dict[str, float]:
     total = sum(counter.values())
     return {k: v/total for k, v in counter.items()} if total > 0 else {}
 
+def _vectorize(tokens: Counter, df: Counter, n_docs: int) -> Dict[str, float]:
+    v = {}
+    for t, c in tokens.items():
+        idf = math.log((n_docs + 1) / (1 + df.get(t, 0))) + 1.0
+        v[t] = c * idf
+    # L2 normalize
+    norm = math.sqrt(sum(val*val for val in v.values()))
+    if norm > 0:
+        v = {k: val/norm for k, val in v.items()}
+    return v
+
 class SimpleVectorIndex:
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024):
+        # docs/df/N are the build-side state filled by add()/finalize(); search() only reads
+        # the snapshot finalize() publishes as a single tuple, so a rebuild never tears a search.
         self.docs: List[Dict[str, Any]] = []
         self.df = Counter()
         self.N = 0
+        self._snapshot: Tuple[int, List[Dict[str, Any]], Counter, int, List[Dict[str, float]]] = (0, [], Counter(), 0, [])
+        self._build_lock = threading.Lock()
+        self._qvec_cache = LRUCache(cache_size)
+        self._result_cache = LRUCache(cache_size)
+
+    @property
+    def generation(self) -> int:
+        return self._snapshot[0]
 
     def add(self, doc_id: str, text: str, metadata: Dict[str, Any]):
         tokens = tokenize(text)
@@ -53,23 +77,22 @@ class SimpleVectorIndex:
         self.N += 1
 
     def finalize(self):
-        # compute DF
-        seen = defaultdict(set)
-        for i, d in enumerate(self.docs):
-            for t in d["tokens"]:
-                seen[t].add(i)
-        self.df = Counter({t: len(ixs) for t, ixs in seen.items()})
+        with self._build_lock:
+            docs = list(self.docs)
+            # compute DF
+            seen = defaultdict(set)
+            for i, d in enumerate(docs):
+                for t in d["tokens"]:
+                    seen[t].add(i)
+            df = Counter({t: len(ixs) for t, ixs in seen.items()})
+            # doc vectors only depend on DF, so compute them once per build
+            doc_vecs = [_vectorize(d["tokens"], df, len(docs)) for d in docs]
+            self.df = df
+            self._snapshot = (self._snapshot[0] + 1, docs, df, len(docs), doc_vecs)
 
     def vectorize(self, tokens: Counter) -> Dict[str, float]:
-        v = {}
-        for t, c in tokens.items():
-            idf = math.log((self.N + 1) / (1 + self.df.get(t, 0))) + 1.0
-            v[t] = c * idf
-        # L2 normalize
-        norm = math.sqrt(sum(val*val for val in v.values()))
-        if norm > 0:
-            v = {k: val/norm for k, val in v.items()}
-        return v
+        _, _, df, n_docs, _ = self._snapshot
+        return _vectorize(tokens, df, n_docs)
 
     def cosine(self, a: Dict[str, float], b: Dict[str, float]) -> float:
         if not a or not b:
@@ -81,19 +104,31 @@ class SimpleVectorIndex:
         return dot
 
     def search(self, query: str, top_k: int = 4) -> List[Dict[str, Any]]:
-        qtokens = Counter(tokenize(query))
-        qv = self.vectorize(qtokens)
-        scored = []
-        for d in self.docs:
-            dv = self.vectorize(d["tokens"])
-            s = self.cosine(qv, dv)
-            scored.append((s, d))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [{"score": s, **d} for s, d in scored[:top_k]]
+        generation, docs, df, n_docs, doc_vecs = self._snapshot
+        key = (generation, normalize_query(query))
+        hit = self._result_cache.get(key + (top_k,))
+        if hit is None:
+            qv = self._qvec_cache.get(key)
+            if qv is None:
+                qv = _vectorize(Counter(tokenize(key[1])), df, n_docs)
+                self._qvec_cache.put(key, qv)
+            scored = [(self.cosine(qv, dv), d) for d, dv in zip(docs, doc_vecs)]
+            scored.sort(key=lambda x: x[0], reverse=True)
+            hit = tuple(scored[:top_k])
+            self._result_cache.put(key + (top_k,), hit)
+        # fresh dicts per call so callers can't mutate cached results
+        return [{"score": s, **d} for s, d in hit]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            "generation": self.generation,
+            "vectors": self._qvec_cache.stats(),
+            "results": self._result_cache.stats(),
+        }
 
 def build_knowledge_index(knowledge_dir: str, config_path: str = None) -> SimpleVectorIndex:
     cfg = load_config(config_path)
-    idx = SimpleVectorIndex()
+    idx = SimpleVectorIndex(cache_size=cfg["query_cache_size"])
     for fname in os.listdir(knowledge_dir):
         if not fname.endswith(".md"):
             continue
@@ -0,0 +1,45 @@
+
+from src.retriever import SimpleVectorIndex
+
+def _index():
+    idx = SimpleVectorIndex(cache_size=8)
+    idx.add("a", "coffee shop opener about espresso", {"source": "a.md"})
+    idx.add("b", "professional event networking intro", {"source": "b.md"})
+    idx.finalize()
+    return idx
+
+def test_repeated_query_hits_cache():
+    idx = _index()
+    first = idx.search("venue:Coffee shop", top_k=1)
+    again = idx.search("  venue:coffee   SHOP ", top_k=1)
+    assert first == again and first[0]["id"] == "a"
+    assert idx.cache_stats()["results"]["hits"] == 1
+
+def test_rebuild_invalidates_cache():
+    idx = _index()
+    idx.search("networking event", top_k=1)
+    idx.add("c", "networking event networking event", {"source": "c.md"})
+    idx.finalize()
+    assert idx.search("networking event", top_k=1)[0]["id"] == "c"
+    assert idx.cache_stats()["generation"] == 2
+
+def test_rebuild_while_searching():
+    import threading
+    idx = _index()
+    errors, stop = [], threading.Event()
+    def searcher():
+        while not stop.is_set():
+            try:
+                res = idx.search("networking event coffee", top_k=2)
+                assert all(r["score"] <= 1.0 + 1e-9 for r in res)
+            except Exception as e:
+                errors.append(e)
+    ts = [threading.Thread(target=searcher) for _ in range(4)]
+    for t in ts: t.start()
+    for i in range(200):
+        idx.add(f"d{i}", f"networking event topic{i} coffee", {"source": "d.md"})
+        idx.finalize()
+    stop.set()
+    for t in ts: t.join()
+    assert not errors
+    assert idx.generation == 201